@@ -0,0 +1,162 @@
+"""
+Benchmarks for the git_commiter_to_repo helpers.
+
+Usage:
+    python -m git_commiter_to_repo.benchmark [file_count]
+    python -m git_commiter_to_repo.benchmark importtime
+    python -m git_commiter_to_repo.benchmark staging
+
+Builds a synthetic repository in a temporary directory and times the
+tracked-size engine against the original per-file stat loop. The
+importtime mode reports the cumulative
+`python -X importtime` cost of importing the module. The staging mode
+stages a mix of staged deletions, renames, modifications and new files the
+way the commit pipeline does, and checks that everything is committed.
+"""
+import compileall
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from git_commiter_to_repo import GitSession, _calculate_size_from_ls_files, stage_paths
+
+
+def legacy_size_from_ls_files(directory: str) -> int:
+    """Original implementation: isfile + getsize for every tracked path."""
+    total_size = 0
+    tracked_files = subprocess.run(
+        ["git", "ls-files", "-z"],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.split('\0')
+
+    for file in tracked_files:
+        if file:
+            file_path = os.path.join(directory, file)
+            if os.path.isfile(file_path):
+                total_size += os.path.getsize(file_path)
+    return total_size
+
+
+def create_synthetic_repo(directory: str, file_count: int, files_per_dir: int = 250) -> None:
+    """Create a git repository with `file_count` small tracked files."""
+    subprocess.run(["git", "init", "-q"], cwd=directory, check=True)
+    for i in range(file_count):
+        sub_dir = os.path.join(directory, f"pkg{i // files_per_dir:05d}")
+        if i % files_per_dir == 0:
+            os.makedirs(sub_dir, exist_ok=True)
+        with open(os.path.join(sub_dir, f"file{i:07d}.txt"), "w") as f:
+            f.write("x" * (i % 512))
+    subprocess.run(["git", "add", "-A"], cwd=directory, check=True)
+    subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com",
+                    "commit", "-q", "-m", "synthetic"], cwd=directory, check=True)
+
+
+def time_call(func, *args, repeat: int = 3):
+    """Return (best wall time in seconds, result) over `repeat` runs."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark_tracked_size(file_count: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Creating synthetic repository with {file_count} files...")
+        create_synthetic_repo(directory, file_count)
+
+        legacy_time, legacy_size = time_call(legacy_size_from_ls_files, directory)
+        new_time, new_size = time_call(_calculate_size_from_ls_files, directory)
+
+        print(f"legacy isfile/getsize : {legacy_time:.3f}s ({legacy_size} bytes)")
+        print(f"size engine           : {new_time:.3f}s ({new_size} bytes)")
+        print(f"speedup               : {legacy_time / new_time:.2f}x")
+        if legacy_size != new_size:
+            raise SystemExit("Size mismatch between implementations")
+
+
+def measure_import_time(module: str = "git_commiter_to_repo") -> tuple[int, list[tuple[int, str]]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and return its
+    cumulative time in microseconds plus the slowest top-level imports.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    total, top_level = 0, []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(1)), len(match.group(2)), match.group(3)
+        if name == module:
+            total = cumulative
+        elif indent == 3:
+            top_level.append((cumulative, name))
+    return total, sorted(top_level, reverse=True)[:5]
+
+
+def benchmark_import_time(repeat: int = 5) -> None:
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    # Byte-compile first so a stale .pyc does not count as import time
+    compileall.compile_dir(package_dir, quiet=1)
+
+    runs = [measure_import_time() for _ in range(repeat)]
+    best_total, slowest = min(runs)
+    print(f"import git_commiter_to_repo: {best_total / 1000:.1f} ms (best of {repeat})")
+    for cumulative, name in slowest:
+        print(f"  {name:<24} {cumulative / 1000:.1f} ms")
+
+
+def check_staging() -> None:
+    """Repro: fully staged changes such as `git rm` must not be passed to `git add` again."""
+    def git(*args, directory):
+        return subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+                              cwd=directory, capture_output=True, text=True, check=True).stdout
+
+    with tempfile.TemporaryDirectory() as directory:
+        git("init", "-q", directory=directory)
+        for name in ("removed.txt", "renamed.txt", "modified.txt", "staged and modified.txt"):
+            with open(os.path.join(directory, name), "w") as f:
+                f.write(name)
+        git("add", "-A", directory=directory)
+        git("commit", "-q", "-m", "initial", directory=directory)
+
+        git("rm", "-q", "removed.txt", directory=directory)
+        git("mv", "renamed.txt", "moved.txt", directory=directory)
+        with open(os.path.join(directory, "modified.txt"), "a") as f:
+            f.write(" changed")
+        with open(os.path.join(directory, "staged and modified.txt"), "a") as f:
+            f.write(" staged")
+        git("add", "staged and modified.txt", directory=directory)
+        with open(os.path.join(directory, "staged and modified.txt"), "a") as f:
+            f.write(" then modified")
+        with open(os.path.join(directory, "new file.txt"), "w") as f:
+            f.write("new")
+
+        status = GitSession(directory).status()
+        print(f"to stage: {status.paths}")
+        print(f"already staged: {status.staged}")
+        stage_paths(directory, status.paths)
+        git("commit", "-q", "-m", "update", directory=directory)
+        remaining = git("status", "--porcelain", directory=directory)
+        if remaining:
+            raise SystemExit(f"Changes left after commit:\n{remaining}")
+        print("All changes committed")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "importtime":
+        benchmark_import_time()
+    elif len(sys.argv) > 1 and sys.argv[1] == "staging":
+        check_staging()
+    else:
+        benchmark_tracked_size(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
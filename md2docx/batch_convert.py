@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Batch Markdown to DOCX conversion for whole directory trees.
+
+Every *.md file under the source directory is converted in a pool of worker
+processes, mirroring the tree into the output directory. A manifest in the
+output directory records the SHA-256 of each converted source and the
+renderer version (a hash of the converter code), so files that have not
+changed since the last run are skipped.
+
+Usage:
+    python batch_convert.py docs/ -o build/docx
+    python batch_convert.py docs/ --renderer md2docx_1 --jobs 8 --force
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+MANIFEST_NAME = ".md2docx-manifest.json"
+
+# Converter module -> conversion function
+RENDERERS = {
+    "md2docx_1": "convert_markdown_to_docx",
+    "md2docx_2": "markdown_to_docx",
+}
+
+# Extra keyword arguments for converters that would otherwise print per file
+BATCH_OPTIONS = {
+    "md2docx_2": {"quiet": True},
+}
+
+# Modules whose code decides what a converted document looks like
+SHARED_MODULES = ("markdown_blocks.py", "inline_spans.py", "docx_writer.py", "code_highlight.py")
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def renderer_version(renderer):
+    """Hash of the converter's source and the shared modules it renders with."""
+    digest = hashlib.sha256()
+    for file_name in (f"{renderer}.py",) + SHARED_MODULES:
+        with open(os.path.join(MODULE_DIR, file_name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_markdown_files(source_dir):
+    """Relative paths of the Markdown files under `source_dir`, in a stable order."""
+    markdown_files = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for file_name in sorted(files):
+            if file_name.lower().endswith(".md"):
+                markdown_files.append(os.path.relpath(os.path.join(root, file_name), source_dir))
+    return markdown_files
+
+
+def load_manifest(path, version):
+    """Return the manifest's file hashes, or {} if it is missing or was written by another renderer version."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("renderer_version") != version:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(path, renderer, version, files):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"renderer": renderer, "renderer_version": version, "files": files}, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def output_path_for(output_dir, relative_path):
+    return os.path.join(output_dir, os.path.splitext(relative_path)[0] + ".docx")
+
+
+def convert_file(renderer, source_path, output_path):
+    """Convert one file in a worker process; returns an error message or None."""
+    import importlib
+
+    convert = getattr(importlib.import_module(renderer), RENDERERS[renderer])
+    try:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(source_path, encoding="utf-8") as f:
+            convert(f, output_path, streaming=True, cached_template=True, **BATCH_OPTIONS.get(renderer, {}))
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def batch_convert(source_dir, output_dir=None, renderer="md2docx_2", jobs=None, force=False):
+    """
+    Convert the changed Markdown files under `source_dir`.
+    Returns (converted, skipped, failed) counts.
+    """
+    output_dir = output_dir or source_dir
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    version = renderer_version(renderer)
+    previous = {} if force else load_manifest(manifest_path, version)
+
+    files = {}
+    pending = []
+    for relative_path in find_markdown_files(source_dir):
+        digest = hash_file(os.path.join(source_dir, relative_path))
+        output_path = output_path_for(output_dir, relative_path)
+        if previous.get(relative_path) == digest and os.path.exists(output_path):
+            files[relative_path] = digest
+        else:
+            pending.append((relative_path, digest))
+
+    skipped = len(files)
+    failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(convert_file, renderer, os.path.join(source_dir, relative_path),
+                                output_path_for(output_dir, relative_path)): (relative_path, digest)
+                for relative_path, digest in pending
+            }
+            for future in as_completed(futures):
+                relative_path, digest = futures[future]
+                error = future.result()
+                if error:
+                    failed += 1
+                    print(f"Failed to convert {relative_path}: {error}", file=sys.stderr)
+                else:
+                    files[relative_path] = digest
+    finally:
+        # Record whatever finished, so an interrupted run is resumed rather than repeated
+        save_manifest(manifest_path, renderer, version, files)
+
+    return len(pending) - failed, skipped, failed
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a directory tree of Markdown files to DOCX.")
+    parser.add_argument("source", help="Directory containing the Markdown files")
+    parser.add_argument("-o", "--output", help="Output directory (default: next to the sources)")
+    parser.add_argument("-r", "--renderer", choices=sorted(RENDERERS), default="md2docx_2",
+                        help="Converter to use (default: md2docx_2)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--force", action="store_true", help="Convert every file, ignoring the manifest")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    if not os.path.isdir(args.source):
+        print(f"Source directory {args.source} does not exist.")
+        sys.exit(1)
+
+    start_time = time.perf_counter()
+    converted, skipped, failed = batch_convert(args.source, args.output, args.renderer, args.jobs, args.force)
+    print(f"Converted {converted}, skipped {skipped} unchanged, {failed} failed "
+          f"in {time.perf_counter() - start_time:.1f}s")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,463 @@
+"""
+Benchmarks for the md2docx converters.
+
+Usage:
+    python benchmark.py classify [line_count]
+    python benchmark.py parallel [paragraph_count]
+    python benchmark.py streaming [line_count]
+    python benchmark.py template [file_count]
+    python benchmark.py inline [length]
+    python benchmark.py table [row_count]
+    python benchmark.py highlight [block_count]
+    python benchmark.py links [link_count]
+
+classify: times line classification in the block tokenizer on a synthetic
+document (1M lines by default) against the previous sequence of re.match
+calls, and checks that both produce the same blocks.
+
+parallel: converts a synthetic document (50k paragraphs by default) with
+md2docx_2 rendering every block in place, chunk by chunk in a single
+process, and with the process pool, and checks that all three write the
+same document.xml.
+
+streaming: converts a synthetic document (20k lines by default) with both
+converters through python-docx and through the streaming XML writer, and
+checks that every part of the two .docx files is identical.
+
+template: converts many small documents (200 by default) with both
+converters, building the styled base document each time and cloning it
+from the cached template, and checks that the outputs are identical.
+
+inline: times the inline span tokenizer on pathological inputs (runs of
+unmatched asterisks, deeply nested emphasis, unclosed brackets and code
+spans) at 1x, 2x and 4x the given length (50k characters by default), to
+show that the time grows linearly.
+
+table: builds a Markdown table (10k rows by default) as w:tbl XML in one
+pass, inserted into a python-docx document and written by the streaming
+writer, against filling and styling a python-docx table cell by cell (on
+100 and 200 rows only, as that approach is quadratic).
+
+highlight: measures syntax highlighting throughput of fenced code blocks
+(2,000 by default, in four languages): lexer loading, distinct blocks, and
+repeated blocks served from the content-hash memo, against plain runs.
+
+links: checks that link relationship ids match python-docx's relate_to,
+then streams a document of distinct links (20k by default) and one of a
+single repeated link, which should take about the same time.
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+
+from markdown_blocks import (BLANK, HEADING, LIST_ITEM, PARAGRAPH, QUOTE, Block, _fence_block, iter_lines,
+                             tokenize_blocks)
+
+
+def legacy_tokenize_blocks(source):
+    """Previous tokenizer: four re.match patterns tried in turn on every line."""
+    in_code_block = False
+    fence_line = ""
+    code_lines = []
+
+    for line in iter_lines(source):
+        if re.match(r'^\s*```', line):
+            if not in_code_block:
+                in_code_block = True
+                fence_line = line
+                code_lines = []
+            else:
+                in_code_block = False
+                yield _fence_block(fence_line, code_lines)
+            continue
+
+        if in_code_block:
+            code_lines.append(line)
+            continue
+
+        heading_match = re.match(r'^(#{1,6})\s+(.*)', line)
+        if heading_match:
+            yield Block(HEADING, heading_match.group(2).strip(), len(heading_match.group(1)), source=line)
+            continue
+
+        blockquote_match = re.match(r'^\s*(>+)\s?(.*)', line)
+        if blockquote_match:
+            yield Block(QUOTE, blockquote_match.group(2).strip(), len(blockquote_match.group(1)), source=line)
+            continue
+
+        list_match = re.match(r'^(\s*)([-*+])\s+(.*)', line)
+        if list_match:
+            level = len(list_match.group(1).expandtabs(4)) // 2
+            yield Block(LIST_ITEM, list_match.group(3).strip(), level, list_match.group(2), line)
+            continue
+
+        if line.strip() == "":
+            yield Block(BLANK, source=line)
+            continue
+
+        yield Block(PARAGRAPH, line.strip(), source=line)
+
+    if in_code_block:
+        yield _fence_block(fence_line, code_lines)
+
+
+# One repeating unit of the synthetic document, with a few near misses
+# (indented "#", "#######", "-x", "---") that must stay paragraphs.
+SAMPLE_LINES = [
+    "# Module reference",
+    "",
+    "Generated API reference for the module, with a short description.",
+    "## Functions",
+    "- `load(path)` reads a file",
+    "  * nested item",
+    "    + deeper item\twith a tab",
+    "> Note: this call is deprecated",
+    ">> nested quote",
+    "```python",
+    "def load(path):",
+    "    # Not a heading inside a fence",
+    "    return open(path).read()",
+    "```",
+    "   ",
+    "  # indented hash is a paragraph",
+    "####### seven hashes",
+    "-x is not a list item",
+    "---",
+    "A closing paragraph line.   ",
+    "Inline **bold**, *italic*, `code`, snake_case and a [link](https://example.com/docs) in a paragraph.",
+]
+
+
+# A small table, kept out of SAMPLE_LINES because the legacy tokenizer has no tables
+SAMPLE_TABLE_LINES = [
+    "| Option | Default | Description |",
+    "|:-------|:-------:|------------:|",
+    "| `path` | **none** | File to [load](https://example.com/load) |",
+    "| mode | r | Open mode \\| text |",
+    "| short row |",
+    "",
+]
+
+
+def create_synthetic_markdown(line_count: int, sample_lines: list = SAMPLE_LINES) -> str:
+    repeats = line_count // len(sample_lines) + 1
+    return "\n".join((sample_lines * repeats)[:line_count]) + "\n"
+
+
+def time_call(func, *args, repeat: int = 3):
+    """Return (best wall time in seconds, result) over `repeat` runs."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark_classify(line_count: int = 1_000_000) -> None:
+    markdown = create_synthetic_markdown(line_count)
+    print(f"Tokenizing {line_count} lines ({len(markdown) / 1e6:.1f} MB)...")
+
+    split_time, _ = time_call(lambda text: sum(1 for _ in iter_lines(text)), markdown)
+    legacy_time, legacy_blocks = time_call(lambda text: list(legacy_tokenize_blocks(text)), markdown)
+    new_time, new_blocks = time_call(lambda text: list(tokenize_blocks(text)), markdown)
+
+    print(f"line splitting only   : {split_time:.3f}s")
+    print(f"re.match sequence     : {legacy_time:.3f}s ({legacy_time - split_time:.3f}s classifying)")
+    print(f"first-char dispatch   : {new_time:.3f}s ({new_time - split_time:.3f}s classifying)")
+    print(f"speedup (total)       : {legacy_time / new_time:.2f}x")
+    if legacy_blocks != new_blocks:
+        raise SystemExit("Block mismatch between tokenizers")
+
+
+def create_sectioned_markdown(paragraph_count: int, section_size: int = 100) -> str:
+    """Markdown with a top-level heading every `section_size` paragraphs."""
+    lines = []
+    for i in range(paragraph_count):
+        if i % section_size == 0:
+            lines.append(f"# Section {i // section_size}")
+        elif i % 10 == 1:
+            lines.append(f"- list item {i} with a [link](https://example.com/{i})")
+        elif i % 100 == 50:
+            lines.extend(["", "| Key | Value |", "| --- | ---: |", f"| row {i} | [{i}](https://example.com/t{i % 5}) |", ""])
+        else:
+            lines.append(f"Paragraph {i} of the generated reference, long enough to wrap once.")
+    return "\n".join(lines) + "\n"
+
+
+def render_in_place(markdown: str, output_file: str) -> None:
+    """md2docx_2 without chunking: every block added straight to the output document."""
+    import md2docx_2
+
+    doc, code_style_name = md2docx_2.build_base_document()
+    md2docx_2.render_blocks(doc, tokenize_blocks(markdown), code_style_name)
+    doc.save(output_file)
+
+
+def benchmark_parallel(paragraph_count: int = 50_000) -> None:
+    import md2docx_2
+
+    markdown = create_sectioned_markdown(paragraph_count)
+    workers = max(2, os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as directory:
+        in_place_path = os.path.join(directory, "in-place.docx")
+        serial_path = os.path.join(directory, "serial.docx")
+        parallel_path = os.path.join(directory, "parallel.docx")
+        print(f"Converting {paragraph_count} paragraphs...")
+        in_place_time, _ = time_call(render_in_place, markdown, in_place_path, repeat=1)
+        serial_time, _ = time_call(md2docx_2.markdown_to_docx, markdown, serial_path, repeat=1)
+        parallel_time, _ = time_call(md2docx_2.markdown_to_docx, markdown, parallel_path, workers, repeat=1)
+
+        print(f"unchunked, in place   : {in_place_time:.3f}s")
+        print(f"chunked, one process  : {serial_time:.3f}s ({in_place_time / serial_time:.2f}x)")
+        print(f"{workers} worker processes    : {parallel_time:.3f}s ({os.cpu_count()} CPUs, "
+              f"{serial_time / parallel_time:.2f}x over one process)")
+        documents = []
+        for path in (in_place_path, serial_path, parallel_path):
+            with zipfile.ZipFile(path) as docx:
+                documents.append(docx.read("word/document.xml"))
+        if not documents[0] == documents[1] == documents[2]:
+            raise SystemExit("document.xml differs between in-place, chunked and parallel output")
+
+
+def compare_docx_parts(first_path: str, second_path: str) -> list[str]:
+    """Return the names of the zip parts that differ between two .docx files."""
+    with zipfile.ZipFile(first_path) as first, zipfile.ZipFile(second_path) as second:
+        names = set(first.namelist()) | set(second.namelist())
+        return sorted(name for name in names
+                      if name not in first.namelist() or name not in second.namelist()
+                      or first.read(name) != second.read(name))
+
+
+def benchmark_streaming(line_count: int = 20_000) -> None:
+    import md2docx_1
+    import md2docx_2
+
+    markdown = create_synthetic_markdown(line_count, SAMPLE_LINES + SAMPLE_TABLE_LINES)
+    converters = [("md2docx_1", md2docx_1.convert_markdown_to_docx), ("md2docx_2", md2docx_2.markdown_to_docx)]
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Converting {line_count} lines...")
+        for name, convert in converters:
+            object_path = os.path.join(directory, f"{name}-objects.docx")
+            stream_path = os.path.join(directory, f"{name}-stream.docx")
+            object_time, _ = time_call(convert, markdown, object_path, repeat=1)
+            stream_time, _ = time_call(lambda: convert(markdown, stream_path, streaming=True), repeat=1)
+
+            print(f"{name} python-docx   : {object_time:.3f}s")
+            print(f"{name} streaming XML : {stream_time:.3f}s ({object_time / stream_time:.1f}x)")
+            differing_parts = compare_docx_parts(object_path, stream_path)
+            if differing_parts:
+                raise SystemExit(f"{name}: streaming output differs in {', '.join(differing_parts)}")
+
+
+def benchmark_template(file_count: int = 200) -> None:
+    import md2docx_1
+    import md2docx_2
+    import template_cache
+
+    markdown = create_synthetic_markdown(40)
+    # md2docx_2 prints "Document saved" for every file unless told otherwise
+    converters = [("md2docx_1", md2docx_1.convert_markdown_to_docx, {}),
+                  ("md2docx_2", md2docx_2.markdown_to_docx, {"quiet": True})]
+    with tempfile.TemporaryDirectory() as directory:
+        template_cache.TEMPLATE_CACHE_DIR = os.path.join(directory, "cache")
+        print(f"Converting {file_count} small documents per converter (streaming backend)...")
+        for name, convert, options in converters:
+            fresh_path = os.path.join(directory, f"{name}-fresh.docx")
+            cached_path = os.path.join(directory, f"{name}-cached.docx")
+
+            def convert_all(path, cached_template):
+                for _ in range(file_count):
+                    convert(markdown, path, streaming=True, cached_template=cached_template, **options)
+
+            fresh_time, _ = time_call(convert_all, fresh_path, False, repeat=1)
+            cached_time, _ = time_call(convert_all, cached_path, True, repeat=1)
+            print(f"{name} styled per file : {fresh_time / file_count * 1000:.1f} ms/file")
+            print(f"{name} cached template : {cached_time / file_count * 1000:.1f} ms/file "
+                  f"({fresh_time / cached_time:.2f}x)")
+            differing_parts = compare_docx_parts(fresh_path, cached_path)
+            if differing_parts:
+                raise SystemExit(f"{name}: cached-template output differs in {', '.join(differing_parts)}")
+
+
+# Inputs that make naive backtracking emphasis and link matching quadratic
+PATHOLOGICAL_INLINE = {
+    "asterisks": lambda n: "*" * n,
+    "unmatched openers": lambda n: "*a " * (n // 3),
+    "nested emphasis": lambda n: "*_" * (n // 4) + "x" + "_*" * (n // 4),
+    "nested bold": lambda n: "**a " * (n // 8) + "b" + " c**" * (n // 8),
+    "open brackets": lambda n: "[" * n,
+    "unclosed links": lambda n: "[a](" * (n // 4),
+    "backtick runs": lambda n: "".join("`" * (i % 7 + 1) + "x" for i in range(n // 5)),
+    "plain text": lambda n: ("lorem ipsum " * (n // 12 + 1))[:n],
+}
+
+
+def benchmark_inline(length: int = 50_000) -> None:
+    import gc
+    from inline_spans import tokenize_inline
+
+    # Collector pauses on the many small objects would blur the scaling
+    gc.disable()
+    print(f"{'input':<18}" + "".join(f"{f'{length * factor // 1000}k chars':>14}" for factor in (1, 2, 4))
+          + f"{'4x / 1x':>10}")
+    for name, make_input in PATHOLOGICAL_INLINE.items():
+        times = [time_call(tokenize_inline, make_input(length * factor))[0] for factor in (1, 2, 4)]
+        print(f"{name:<18}" + "".join(f"{t * 1000:>11.2f} ms" for t in times) + f"{times[2] / times[0]:>9.1f}x")
+    gc.enable()
+
+
+def benchmark_links(link_count: int = 20_000) -> None:
+    from docx import Document
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+
+    import md2docx_2
+    from inline_spans import hyperlink_rel_id
+
+    # Same ids as relate_to, including the gaps it fills, on a small sample
+    urls = [f"https://example.com/api/{i % 300}" for i in range(600)]
+    relate_doc, fast_doc = Document(), Document()
+    for doc in (relate_doc, fast_doc):
+        doc.part.rels.pop("rId2")  # A gap relate_to fills first
+    relate_ids = [relate_doc.part.relate_to(url, RT.HYPERLINK, is_external=True) for url in urls]
+    fast_ids = [hyperlink_rel_id(fast_doc.part, url) for url in urls]
+    if relate_ids != fast_ids:
+        raise SystemExit("hyperlink_rel_id assigns different ids than relate_to")
+
+    distinct = "".join(f"- [symbol {i}](https://example.com/api/{i})\n" for i in range(link_count))
+    repeated = "".join(f"- [symbol {i}](https://example.com/api)\n" for i in range(link_count))
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Streaming {link_count} links...")
+        for name, markdown in (("distinct links", distinct), ("one repeated link", repeated)):
+            path = os.path.join(directory, "links.docx")
+            elapsed, _ = time_call(lambda: md2docx_2.markdown_to_docx(markdown, path, streaming=True, quiet=True),
+                                   repeat=1)
+            print(f"{name:<22}: {elapsed:.3f}s")
+
+
+def create_markdown_table(row_count: int) -> str:
+    lines = ["| Name | Kind | Size |", "|:-----|:----:|-----:|"]
+    lines.extend(f"| item_{i} | `kind{i % 4}` | {i * 37 % 1000} |" for i in range(row_count))
+    return "\n".join(lines) + "\n"
+
+
+def fill_table_cell_by_cell(document, rows) -> None:
+    """The add_table / cell.text approach, styled like create_table_style."""
+    from docx.enum.table import WD_ALIGN_VERTICAL, WD_TABLE_ALIGNMENT
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    from docx.shared import Pt, RGBColor
+
+    table = document.add_table(rows=len(rows), cols=len(rows[0]))
+    table.style = 'Table Grid'
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    for row_index, row in enumerate(rows):
+        for column_index, text in enumerate(row):
+            cell = table.cell(row_index, column_index)
+            cell.text = text
+            if row_index == 0:
+                cell._tc.get_or_add_tcPr().append(parse_xml(f'<w:shd {nsdecls("w")} w:fill="2C3E50"/>'))
+                for run in cell.paragraphs[0].runs:
+                    run.font.color.rgb = RGBColor(255, 255, 255)
+                    run.font.bold = True
+            elif row_index % 2 == 1:
+                cell._tc.get_or_add_tcPr().append(parse_xml(f'<w:shd {nsdecls("w")} w:fill="ECEFF1"/>'))
+            cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
+            cell.paragraphs[0].paragraph_format.space_before = Pt(6)
+            cell.paragraphs[0].paragraph_format.space_after = Pt(6)
+
+
+def benchmark_table(row_count: int = 10_000) -> None:
+    from docx import Document
+    import docx_writer
+    import md2docx_2
+
+    markdown = create_markdown_table(row_count)
+    table = next(tokenize_blocks(markdown))
+    cell_count = len(table.rows) * table.level
+    print(f"Table with {row_count} rows x {table.level} columns ({cell_count} cells)")
+
+    for naive_count in (100, 200):
+        naive_rows = table.rows[:naive_count + 1]
+        naive_time, _ = time_call(lambda: fill_table_cell_by_cell(Document(), naive_rows), repeat=1)
+        print(f"cell by cell, {naive_count} rows : {naive_time:.3f}s "
+              f"({naive_time / (len(naive_rows) * table.level) * 1e6:.0f} us/cell)")
+    xml_time, _ = time_call(lambda: docx_writer.table_xml(table.rows, table.info, "TableGrid", 9360, str))
+    append_time, _ = time_call(lambda: docx_writer.append_table(Document(), table.rows, table.info))
+    print(f"table_xml             : {xml_time:.3f}s ({xml_time / cell_count * 1e6:.1f} us/cell)")
+    print(f"append_table          : {append_time:.3f}s ({append_time / cell_count * 1e6:.1f} us/cell)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        object_path = os.path.join(directory, "objects.docx")
+        stream_path = os.path.join(directory, "stream.docx")
+        object_time, _ = time_call(md2docx_2.markdown_to_docx, markdown, object_path, repeat=1)
+        stream_time, _ = time_call(lambda: md2docx_2.markdown_to_docx(markdown, stream_path, streaming=True),
+                                   repeat=1)
+        print(f"md2docx_2 python-docx : {object_time:.3f}s")
+        print(f"md2docx_2 streaming   : {stream_time:.3f}s")
+        differing_parts = compare_docx_parts(object_path, stream_path)
+        if differing_parts:
+            raise SystemExit(f"streaming output differs in {', '.join(differing_parts)}")
+        if len(Document(object_path).tables[0].rows) != row_count + 1:
+            raise SystemExit("table row count mismatch")
+
+
+# Code blocks for the highlight benchmark; VALUE is replaced to make blocks distinct
+SAMPLE_CODE = {
+    "python": 'def load(path, retries=VALUE):\n    """Read a file."""\n    with open(path) as f:\n'
+              '        return [line.strip() for line in f if line]\n',
+    "javascript": "const limit = VALUE;\nfunction load(path) {\n  return fetch(path).then(r => r.json());\n}\n",
+    "bash": 'for file in docs/*.md; do\n  echo "converting $file" && sleep VALUE\ndone\n',
+    "json": '{\n  "name": "md2docx",\n  "version": VALUE,\n  "tags": ["docx", "markdown"]\n}\n',
+}
+
+
+def benchmark_highlight(block_count: int = 2_000) -> None:
+    import code_highlight
+    from docx_writer import run_xml
+
+    languages = list(SAMPLE_CODE)
+    distinct = [(languages[i % len(languages)], SAMPLE_CODE[languages[i % len(languages)]].replace("VALUE", str(i)))
+                for i in range(block_count)]
+    # 20 different blocks, repeated
+    repeated = [distinct[i % 20] for i in range(block_count)]
+    megabytes = sum(len(code) for _, code in distinct) / 1e6
+    print(f"Highlighting {block_count} code blocks ({megabytes:.2f} MB)")
+
+    start = time.perf_counter()
+    for language in languages:
+        code_highlight.get_lexer(language)
+    print(f"lexer loading (cold)  : {(time.perf_counter() - start) * 1000:.1f} ms for {len(languages)} languages")
+
+    def highlight_all(blocks):
+        code_highlight._memo.clear()
+        for language, code in blocks:
+            code_highlight.code_runs_xml(code, language)
+
+    plain_time, _ = time_call(lambda: [run_xml(code) for _, code in distinct])
+    distinct_time, _ = time_call(highlight_all, distinct)
+    repeated_time, _ = time_call(highlight_all, repeated)
+    for name, elapsed in (("plain runs", plain_time), ("highlighted, distinct", distinct_time),
+                          ("highlighted, repeated", repeated_time)):
+        print(f"{name:<22}: {elapsed:.3f}s ({block_count / elapsed:,.0f} blocks/s, {megabytes / elapsed:.2f} MB/s)")
+
+
+BENCHMARKS = {
+    "classify": (benchmark_classify, 1_000_000),
+    "parallel": (benchmark_parallel, 50_000),
+    "streaming": (benchmark_streaming, 20_000),
+    "template": (benchmark_template, 200),
+    "inline": (benchmark_inline, 50_000),
+    "table": (benchmark_table, 10_000),
+    "highlight": (benchmark_highlight, 2_000),
+    "links": (benchmark_links, 20_000),
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        raise SystemExit(f"Usage: python benchmark.py {{{'|'.join(BENCHMARKS)}}} [size]")
+    benchmark, default_size = BENCHMARKS[sys.argv[1]]
+    benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else default_size)
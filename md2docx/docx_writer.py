@@ -0,0 +1,270 @@
+"""
+Streaming WordprocessingML writer for the md2docx converters.
+
+DocxStreamWriter writes body paragraphs as XML text straight into the
+word/document.xml entry of the output zip, instead of building python-docx
+objects for each paragraph. Memory stays flat and large documents are
+written at close to I/O speed.
+
+The styles, sections, header/footer and any leading content (such as a
+title page or table of contents) come from a python-docx template document
+prepared with the usual styling functions. Its other parts are copied into
+the output when the writer is closed, so style changes made while streaming
+are kept.
+
+Tables are built the same way: table_xml() renders every row of a Markdown
+table in one pass, and append_table() inserts that XML into a python-docx
+document with a single parse, instead of filling cells one at a time.
+
+Usage:
+    with DocxStreamWriter(template, "output.docx") as writer:
+        writer.add_paragraph("Hello", style="Heading 1")
+"""
+
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Pt
+
+from inline_spans import hyperlink_rel_id, span_run_properties, tokenize_inline
+
+DOCUMENT_PART = "word/document.xml"
+
+# Characters lxml (and so python-docx) refuses in XML text
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Tabs and line breaks become <w:tab/> and <w:br/> elements
+_RUN_SPECIAL_CHARS = re.compile("([\t\r\n])")
+
+# Table look of convert_docx_to_nice_style.create_table_style: a centered
+# "Table Grid" table with a dark header row in white bold text, shaded odd
+# rows, vertically centered cells and 6pt of spacing around cell text.
+TABLE_STYLE = "Table Grid"
+TABLE_HEADER_FILL = "2C3E50"
+TABLE_HEADER_COLOR = "FFFFFF"
+TABLE_BAND_FILL = "ECEFF1"
+TABLE_CELL_SPACING = f'<w:spacing w:before="{Pt(6).twips}" w:after="{Pt(6).twips}"/>'
+_TABLE_ALIGNMENTS = {"l": '<w:jc w:val="left"/>', "c": '<w:jc w:val="center"/>', "r": '<w:jc w:val="right"/>'}
+
+
+def text_xml(text):
+    """<w:t> element for `text`, preserving leading or trailing whitespace."""
+    if len(text.strip()) < len(text):
+        return f'<w:t xml:space="preserve">{escape(text)}</w:t>'
+    return f"<w:t>{escape(text)}</w:t>"
+
+
+def run_content_xml(text):
+    """Run content for `text`, converting tabs and line breaks like python-docx's Run.text."""
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    if "\t" not in text and "\n" not in text and "\r" not in text:
+        return text_xml(text)
+
+    parts = []
+    for piece in _RUN_SPECIAL_CHARS.split(text):
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in ("\r", "\n"):
+            parts.append("<w:br/>")
+        elif piece:
+            parts.append(text_xml(piece))
+    return "".join(parts)
+
+
+def run_xml(text, properties=""):
+    """<w:r> element for `text`, with optional <w:rPr> children."""
+    run_properties = f"<w:rPr>{properties}</w:rPr>" if properties else ""
+    return f"<w:r>{run_properties}{run_content_xml(text)}</w:r>"
+
+
+def paragraph_xml(text="", style_id=None, properties="", run_properties=""):
+    """
+    <w:p> element with an optional paragraph style and <w:pPr> children,
+    holding one run for `text` (none when `text` is empty).
+    """
+    return paragraph_content_xml(run_xml(text, run_properties) if text else "", style_id, properties)
+
+
+def paragraph_content_xml(content, style_id=None, properties=""):
+    """<w:p> element around already rendered runs."""
+    paragraph_properties = f'<w:pStyle w:val="{style_id}"/>{properties}' if style_id else properties
+    if paragraph_properties:
+        return f"<w:p><w:pPr>{paragraph_properties}</w:pPr>{content}</w:p>"
+    return f"<w:p>{content}</w:p>" if content else "<w:p/>"
+
+
+def spans_xml(spans, hyperlink_id, color=None):
+    """
+    Runs for inline spans (see inline_spans), as add_spans renders them.
+    `hyperlink_id(url)` returns the relationship id for a link target.
+    """
+    runs = []
+    for span in spans:
+        run = run_xml(span.text, span_run_properties(span, color))
+        if span.url:
+            run = f'<w:hyperlink r:id="{hyperlink_id(span.url)}">{run}</w:hyperlink>'
+        runs.append(run)
+    return "".join(runs)
+
+
+def text_width(document):
+    """Width between the margins of the document's last section, in twips."""
+    section = document.sections[-1]
+    return section.page_width.twips - section.left_margin.twips - section.right_margin.twips
+
+
+def table_xml(rows, alignments, style_id, width, hyperlink_id):
+    """
+    <w:tbl> element for table rows (the first being the header) with equal
+    column widths, cell text rendered as inline spans.
+    """
+    column_count = len(rows[0])
+    column_width = width // column_count
+    cell_width = f'<w:tcW w:type="dxa" w:w="{column_width}"/>'
+    cell_properties = {
+        "header": f'{cell_width}<w:shd w:val="clear" w:fill="{TABLE_HEADER_FILL}"/><w:vAlign w:val="center"/>',
+        "band": f'{cell_width}<w:shd w:val="clear" w:fill="{TABLE_BAND_FILL}"/><w:vAlign w:val="center"/>',
+        "plain": f'{cell_width}<w:vAlign w:val="center"/>',
+    }
+    paragraph_properties = [TABLE_CELL_SPACING + _TABLE_ALIGNMENTS.get(alignment, "")
+                            for alignment in alignments.ljust(column_count, "-")]
+
+    parts = [f'<w:tbl><w:tblPr><w:tblStyle w:val="{style_id}"/><w:tblW w:type="auto" w:w="0"/>'
+             '<w:jc w:val="center"/><w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+             'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr><w:tblGrid>',
+             f'<w:gridCol w:w="{column_width}"/>' * column_count, '</w:tblGrid>']
+    for row_index, row in enumerate(rows):
+        if row_index == 0:
+            # Repeat the header row on every page
+            parts.append('<w:tr><w:trPr><w:tblHeader/></w:trPr>')
+            properties, color = cell_properties["header"], TABLE_HEADER_COLOR
+        else:
+            parts.append('<w:tr>')
+            properties, color = cell_properties["band" if row_index % 2 == 1 else "plain"], None
+        for cell, cell_paragraph_properties in zip(row, paragraph_properties):
+            spans = tokenize_inline(cell)
+            if row_index == 0:
+                spans = [span._replace(bold=True) for span in spans]
+            parts.append(f'<w:tc><w:tcPr>{properties}</w:tcPr><w:p><w:pPr>{cell_paragraph_properties}</w:pPr>'
+                         f'{spans_xml(spans, hyperlink_id, color)}</w:p></w:tc>')
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return "".join(parts)
+
+
+def append_table(document, rows, alignments=""):
+    """
+    Add a table to the end of a python-docx document with one XML parse, as
+    DocxStreamWriter.add_table writes it.
+    """
+    xml = table_xml(rows, alignments, document.styles[TABLE_STYLE].style_id, text_width(document),
+                    lambda url: hyperlink_rel_id(document.part, url))
+    # Parsed inside a <w:body> so the table carries no namespace declarations of its own
+    table = parse_xml(f'<w:body {nsdecls("w", "r")}>{xml}</w:body>')[0]
+    # lxml takes time quadratic in the size of a subtree to move it between
+    # documents, so the rows follow the emptied table one at a time
+    rows = table.findall(qn("w:tr"))
+    for row in rows:
+        table.remove(row)
+    document.element.body.sectPr.addprevious(table)
+    for row in rows:
+        table.append(row)
+
+
+def append_runs_xml(paragraph, xml):
+    """Append rendered runs (such as spans_xml output) to a python-docx paragraph."""
+    for run in parse_xml(f'<w:p {nsdecls("w", "r")}>{xml}</w:p>'):
+        paragraph._p.append(run)
+
+
+class DocxStreamWriter:
+    """
+    Write a .docx by streaming paragraphs into word/document.xml after the
+    content already present in `template`.
+    """
+
+    def __init__(self, template, output_file, buffer_size=1 << 16):
+        self.template = template
+        self.buffer_size = buffer_size
+        self._style_ids = {}
+        self._buffer = []
+        self._buffered = 0
+
+        # Split the template's document.xml around the body's section properties
+        document_xml = serialize_part_xml(template.element)
+        split_at = document_xml.rindex(b"<w:sectPr")
+        self._tail = document_xml[split_at:]
+
+        self._zip = zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED)
+        self._document = self._zip.open(DOCUMENT_PART, "w")
+        self._document.write(document_xml[:split_at])
+
+    def style_id(self, style_name):
+        """Style id of a template style, as python-docx would write it in w:pStyle."""
+        if style_name not in self._style_ids:
+            self._style_ids[style_name] = self.template.styles[style_name].style_id
+        return self._style_ids[style_name]
+
+    def add_paragraph(self, text="", style=None, properties="", run_properties=""):
+        """Append a paragraph; `style` is a style name, as for python-docx's add_paragraph."""
+        self.write(paragraph_xml(text, self.style_id(style) if style else None, properties, run_properties))
+
+    def add_span_paragraph(self, spans, style=None, properties=""):
+        """
+        Append a paragraph of inline spans (see inline_spans), as add_spans
+        renders them; hyperlink targets are added to the template's relationships.
+        """
+        self.add_paragraph_xml(spans_xml(spans, self.hyperlink_id), style, properties)
+
+    def add_paragraph_xml(self, content, style=None, properties=""):
+        """Append a paragraph around already rendered runs."""
+        self.write(paragraph_content_xml(content, self.style_id(style) if style else None, properties))
+
+    def add_table(self, rows, alignments=""):
+        """Append a table of Markdown cell text, styled like append_table."""
+        self.write(table_xml(rows, alignments, self.style_id(TABLE_STYLE), text_width(self.template),
+                             self.hyperlink_id))
+
+    def hyperlink_id(self, url):
+        """Relationship id of an external hyperlink, as python-docx's relate_to assigns it."""
+        return hyperlink_rel_id(self.template.part, url)
+
+    def write(self, xml):
+        """Append raw body XML."""
+        self._buffer.append(xml)
+        self._buffered += len(xml)
+        if self._buffered >= self.buffer_size:
+            self._flush()
+
+    def _flush(self):
+        self._document.write("".join(self._buffer).encode("utf-8"))
+        self._buffer.clear()
+        self._buffered = 0
+
+    def close(self):
+        """Finish document.xml and copy the template's other parts into the zip."""
+        if self._zip is None:
+            return
+        self._flush()
+        self._document.write(self._tail)
+        self._document.close()
+
+        template_file = io.BytesIO()
+        self.template.save(template_file)
+        with zipfile.ZipFile(template_file) as template_zip:
+            for info in template_zip.infolist():
+                if info.filename != DOCUMENT_PART:
+                    self._zip.writestr(info, template_zip.read(info))
+        self._zip.close()
+        self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
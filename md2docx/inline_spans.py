@@ -0,0 +1,378 @@
+"""
+Linear-time inline Markdown tokenizer for the md2docx converters.
+
+tokenize_inline() turns the text of a paragraph into a list of Spans (text
+with bold/italic/code flags and an optional hyperlink URL) in a single pass:
+
+  - `code` spans, matched through per-length queues of backtick runs
+  - *italic*, **bold** and ***both*** (also with underscores), matched with a
+    CommonMark-style delimiter stack
+  - [links](https://example.com), without titles
+  - backslash escapes
+
+Formatting is recorded as ranges over the scanned pieces and applied with
+prefix sums, so deeply nested emphasis or thousands of unmatched delimiters
+stay linear in the length of the text.
+
+add_spans() appends the spans to a python-docx paragraph; the streaming
+writer renders the same runs with span_run_properties(). Both take link
+relationship ids from hyperlink_rel_id().
+"""
+
+import re
+import weakref
+from collections import defaultdict, deque
+from typing import NamedTuple, Optional
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import RGBColor
+
+CODE_FONT = "Consolas"
+HYPERLINK_COLOR = RGBColor(0x05, 0x63, 0xC1)
+
+_SPECIAL_CHARS = re.compile(r"[\\`*_\[\]]")
+_BACKTICK_RUNS = re.compile(r"`+")
+# A link destination ends at ")" (or is invalid at whitespace)
+_DESTINATION_STOP = re.compile(r"[\s)]")
+_ASCII_PUNCTUATION = frozenset("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
+
+# Part -> [link URL -> rId, next rId number to try]
+_hyperlink_rels = weakref.WeakKeyDictionary()
+
+
+class Span(NamedTuple):
+    """A run of inline text and its formatting."""
+    text: str
+    bold: bool = False
+    italic: bool = False
+    code: bool = False
+    url: Optional[str] = None
+
+
+def tokenize_inline(text: str) -> list:
+    """Split paragraph text into formatted Spans."""
+    if not _SPECIAL_CHARS.search(text):
+        return [Span(text)] if text else []
+    return _InlineParser(text).parse()
+
+
+class _Delimiter:
+    """A run of "*" or "_" that may open or close emphasis."""
+    __slots__ = ("char", "length", "count", "can_open", "can_close", "piece", "prev", "next")
+
+    def __init__(self, char, length, can_open, can_close, piece):
+        self.char = char
+        self.length = length  # Original run length, for the "multiple of 3" rule
+        self.count = length   # Characters not yet used by a match
+        self.can_open = can_open
+        self.can_close = can_close
+        self.piece = piece
+        self.prev = None
+        self.next = None
+
+
+class _InlineParser:
+    def __init__(self, text):
+        self.text = text
+        self.pieces = []    # Text of each scanned piece
+        self.code = []      # Whether each piece is a code span
+        self.emphasis = []  # (first piece, end piece, 1 = italic / 2 = bold)
+        self.links = []     # (first piece, end piece, url); never overlapping
+        self.delimiters = []
+        self.first_delimiter = None
+        self.last_delimiter = None
+        self.brackets = []  # (piece of "[", last delimiter when it was seen)
+        self._backtick_runs = None
+        self._scan_start = self._scan_stop = -1
+
+    def parse(self):
+        text = self.text
+        pos = 0
+        while pos < len(text):
+            match = _SPECIAL_CHARS.search(text, pos)
+            if not match:
+                self._add(text[pos:])
+                break
+            i = match.start()
+            if i > pos:
+                self._add(text[pos:i])
+            char = text[i]
+            if char == "\\":
+                if text[i + 1:i + 2] and text[i + 1] in _ASCII_PUNCTUATION:
+                    self._add(text[i + 1])
+                    pos = i + 2
+                else:
+                    self._add("\\")
+                    pos = i + 1
+            elif char == "`":
+                pos = self._code_span(i)
+            elif char == "[":
+                self.brackets.append((self._add("["), self.last_delimiter))
+                pos = i + 1
+            elif char == "]":
+                pos = self._close_bracket(i)
+            else:
+                pos = self._delimiter_run(i)
+
+        self._process_emphasis(None)
+        return self._spans()
+
+    def _add(self, piece, code=False):
+        self.pieces.append(piece)
+        self.code.append(code)
+        return len(self.pieces) - 1
+
+    def _code_span(self, i):
+        text = self.text
+        end = i
+        while end < len(text) and text[end] == "`":
+            end += 1
+        length = end - i
+
+        if self._backtick_runs is None:
+            self._backtick_runs = defaultdict(deque)
+            for run in _BACKTICK_RUNS.finditer(text):
+                self._backtick_runs[len(run.group())].append(run.start())
+        # Closing candidates of this length, dropping the ones already passed
+        candidates = self._backtick_runs[length]
+        while candidates and candidates[0] <= i:
+            candidates.popleft()
+        if not candidates:
+            self._add("`" * length)
+            return end
+
+        close = candidates.popleft()
+        content = text[end:close]
+        if len(content) > 2 and content[0] == " " and content[-1] == " " and content.strip(" "):
+            content = content[1:-1]
+        self._add(content, code=True)
+        return close + length
+
+    def _delimiter_run(self, i):
+        text = self.text
+        char = text[i]
+        end = i
+        while end < len(text) and text[end] == char:
+            end += 1
+        before = text[i - 1] if i > 0 else " "
+        after = text[end] if end < len(text) else " "
+
+        before_space, after_space = before.isspace(), after.isspace()
+        before_punctuation, after_punctuation = before in _ASCII_PUNCTUATION, after in _ASCII_PUNCTUATION
+        left_flanking = not after_space and (not after_punctuation or before_space or before_punctuation)
+        right_flanking = not before_space and (not before_punctuation or after_space or after_punctuation)
+        if char == "*":
+            can_open, can_close = left_flanking, right_flanking
+        else:
+            # "_" does not open or close inside words (snake_case)
+            can_open = left_flanking and (not right_flanking or before_punctuation)
+            can_close = right_flanking and (not left_flanking or after_punctuation)
+
+        piece = self._add(char * (end - i))
+        if can_open or can_close:
+            delimiter = _Delimiter(char, end - i, can_open, can_close, piece)
+            self.delimiters.append(delimiter)
+            delimiter.prev = self.last_delimiter
+            if self.last_delimiter is None:
+                self.first_delimiter = delimiter
+            else:
+                self.last_delimiter.next = delimiter
+            self.last_delimiter = delimiter
+        return end
+
+    def _link_destination(self, i):
+        """Return (url, end) for "(url)" at `i`, or None."""
+        text = self.text
+        if text[i:i + 1] != "(":
+            return None
+        start = i + 1
+        # Scans never overlap: a start inside the last scan shares its stop
+        if not self._scan_start <= start <= self._scan_stop:
+            match = _DESTINATION_STOP.search(text, start)
+            self._scan_start, self._scan_stop = start, match.start() if match else len(text)
+        stop = self._scan_stop
+        if stop == start or stop == len(text) or text[stop] != ")":
+            return None
+        return text[start:stop], stop + 1
+
+    def _close_bracket(self, i):
+        if not self.brackets:
+            self._add("]")
+            return i + 1
+        opener_piece, bottom = self.brackets.pop()
+        destination = self._link_destination(i + 1)
+        if destination is None:
+            self._add("]")
+            return i + 1
+
+        url, end = destination
+        # Emphasis inside the link text is resolved within the link
+        self._process_emphasis(bottom)
+        self.last_delimiter = bottom
+        if bottom is None:
+            self.first_delimiter = None
+        else:
+            bottom.next = None
+
+        self.pieces[opener_piece] = ""
+        self.links.append((opener_piece + 1, len(self.pieces), url))
+        # Links cannot contain links, so earlier "[" stay literal
+        self.brackets.clear()
+        return end
+
+    def _unlink(self, delimiter):
+        if delimiter.prev is None:
+            self.first_delimiter = delimiter.next
+        else:
+            delimiter.prev.next = delimiter.next
+        if delimiter.next is None:
+            self.last_delimiter = delimiter.prev
+        else:
+            delimiter.next.prev = delimiter.prev
+
+    def _process_emphasis(self, bottom):
+        """Match the openers and closers above `bottom` (None for the whole stack)."""
+        closer = bottom.next if bottom is not None else self.first_delimiter
+        openers_bottom = {}
+        while closer is not None:
+            if not closer.can_close:
+                closer = closer.next
+                continue
+
+            key = (closer.char, closer.can_open, closer.length % 3)
+            limit = openers_bottom.get(key, bottom)
+            opener = closer.prev
+            while opener is not None and opener is not limit:
+                if opener.char == closer.char and opener.can_open and not (
+                        (opener.can_close or closer.can_open)
+                        and (opener.length + closer.length) % 3 == 0
+                        and (opener.length % 3 or closer.length % 3)):
+                    break
+                opener = opener.prev
+            else:
+                opener = None
+
+            if opener is None:
+                openers_bottom[key] = closer.prev
+                following = closer.next
+                if not closer.can_open:
+                    self._unlink(closer)
+                closer = following
+                continue
+
+            used = 2 if opener.count >= 2 and closer.count >= 2 else 1
+            opener.count -= used
+            closer.count -= used
+            self.emphasis.append((opener.piece + 1, closer.piece, used))
+            # Delimiters between the pair can no longer match
+            opener.next = closer
+            closer.prev = opener
+            if opener.count == 0:
+                self._unlink(opener)
+            if closer.count == 0:
+                following = closer.next
+                self._unlink(closer)
+                closer = following
+
+    def _spans(self):
+        pieces = self.pieces
+        for delimiter in self.delimiters:
+            pieces[delimiter.piece] = delimiter.char * delimiter.count
+
+        bold_depth = [0] * (len(pieces) + 1)
+        italic_depth = [0] * (len(pieces) + 1)
+        for start, end, used in self.emphasis:
+            depth = bold_depth if used == 2 else italic_depth
+            depth[start] += 1
+            depth[end] -= 1
+        urls = [None] * len(pieces)
+        for start, end, url in self.links:
+            urls[start:end] = [url] * (end - start)
+
+        # Merge neighbouring pieces with the same formatting, joining each group once
+        groups = []
+        bold = italic = 0
+        for index, piece in enumerate(pieces):
+            bold += bold_depth[index]
+            italic += italic_depth[index]
+            if not piece:
+                continue
+            formatting = (bold > 0, italic > 0, self.code[index], urls[index])
+            if groups and groups[-1][0] == formatting:
+                groups[-1][1].append(piece)
+            else:
+                groups.append((formatting, [piece]))
+        return [Span("".join(group), *formatting) for formatting, group in groups]
+
+
+def add_spans(paragraph, spans):
+    """Append the spans to a python-docx paragraph as formatted runs and hyperlinks."""
+    for span in spans:
+        run = paragraph.add_run(span.text)
+        if span.bold:
+            run.bold = True
+        if span.italic:
+            run.italic = True
+        if span.code:
+            run.font.name = CODE_FONT
+        if span.url:
+            run.font.color.rgb = HYPERLINK_COLOR
+            run.font.underline = True
+            hyperlink = OxmlElement("w:hyperlink")
+            paragraph._p.append(hyperlink)
+            hyperlink.set(qn("r:id"), hyperlink_rel_id(paragraph.part, span.url))
+            hyperlink.append(run._r)
+
+
+def hyperlink_rel_id(part, url):
+    """
+    Relationship id of an external hyperlink from `part`, added if missing.
+    The id is the one python-docx's relate_to would assign (the lowest free
+    "rIdN"), but relate_to scans every relationship of the part twice per
+    call, which makes documents with many distinct links quadratic.
+    """
+    state = _hyperlink_rels.get(part)
+    if state is None:
+        ids = {}
+        for r_id, rel in part.rels.items():
+            if rel.is_external and rel.reltype == RT.HYPERLINK:
+                ids.setdefault(rel.target_ref, r_id)
+        state = _hyperlink_rels[part] = [ids, 1]
+    ids = state[0]
+    r_id = ids.get(url)
+    if r_id is None:
+        rels = part.rels
+        number = state[1]
+        while f"rId{number}" in rels:
+            number += 1
+        r_id = f"rId{number}"
+        state[1] = number + 1
+        rels.add_relationship(RT.HYPERLINK, url, r_id, is_external=True)
+        ids[url] = r_id
+    return r_id
+
+
+def forget_hyperlink_rels(part):
+    """Drop the hyperlink_rel_id state of `part`, after relationships were removed from it."""
+    _hyperlink_rels.pop(part, None)
+
+
+def span_run_properties(span, color=None):
+    """
+    <w:rPr> children for a span, as add_spans sets them through python-docx;
+    `color` is a hex text color for spans that are not links.
+    """
+    properties = []
+    if span.code:
+        properties.append(f'<w:rFonts w:ascii="{CODE_FONT}" w:hAnsi="{CODE_FONT}"/>')
+    if span.bold:
+        properties.append("<w:b/>")
+    if span.italic:
+        properties.append("<w:i/>")
+    if span.url:
+        properties.append(f'<w:color w:val="{HYPERLINK_COLOR}"/><w:u w:val="single"/>')
+    elif color:
+        properties.append(f'<w:color w:val="{color}"/>')
+    return "".join(properties)
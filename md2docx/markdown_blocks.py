@@ -0,0 +1,202 @@
+"""
+Streaming Markdown block tokenizer shared by the md2docx converters.
+
+tokenize_blocks() reads Markdown one line at a time, from a string or a text
+file object, and yields one Block per block-level element. The document is
+never held in memory as a whole; only the lines of the fenced code block or
+table currently being read are buffered.
+
+Usage:
+    with open("input.md", encoding="utf-8") as f:
+        for block in tokenize_blocks(f):
+            print(block.kind, block.text)
+"""
+
+import re
+from typing import Iterable, Iterator, NamedTuple, Optional, TextIO, Union
+
+# Block kinds
+HEADING = "heading"
+LIST_ITEM = "list_item"
+FENCE = "fence"
+QUOTE = "quote"
+BLANK = "blank"
+PARAGRAPH = "paragraph"
+TABLE = "table"
+
+# GFM table cells are separated by pipes that are not escaped as "\|"
+_CELL_SEPARATOR = re.compile(r"(?<!\\)\|")
+_ALIGNMENT_CELL = re.compile(r":?-+:?")
+
+
+class Block(NamedTuple):
+    """A block-level Markdown element."""
+    kind: str
+    text: str = ""    # Stripped text; the code or table lines joined with "\n" for fences and tables
+    level: int = 0    # Heading level, quote depth, list nesting (two spaces per level) or table columns
+    info: str = ""    # List marker, the fence's info string (e.g. the language), or table column
+                      # alignments ("l", "c", "r" or "-" per column)
+    source: str = ""  # The original line (the opening fence line for fences, the header for tables)
+    rows: tuple = ()  # Table cells, one tuple per row starting with the header
+
+
+def iter_lines(source: Union[str, TextIO, Iterable[str]]) -> Iterator[str]:
+    """
+    Yield the lines of a string or text file object without line endings,
+    split exactly like str.splitlines() would split the whole text.
+    """
+    chunks = _iter_string_chunks(source) if isinstance(source, str) else source
+    for chunk in chunks:
+        yield from chunk.splitlines() or ("",)
+
+
+def _iter_string_chunks(text: str) -> Iterator[str]:
+    """Yield the "\n"-terminated pieces of `text` without splitting it all at once."""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text) - 1
+        yield text[start:end + 1]
+        start = end + 1
+
+
+def _classify_heading(line: str, stripped: str):
+    # "#" to "######" at the very start of the line, followed by whitespace
+    if len(stripped) != len(line):
+        return None
+    level = len(line) - len(line.lstrip("#"))
+    if level > 6 or not line[level:level + 1].isspace():
+        return None
+    return Block(HEADING, line[level:].strip(), level, source=line)
+
+
+def _classify_quote(line: str, stripped: str):
+    # One or more ">" after optional indentation
+    text = stripped.lstrip(">")
+    return Block(QUOTE, text.strip(), len(stripped) - len(text), source=line)
+
+
+def _classify_list_item(line: str, stripped: str):
+    # "-", "*" or "+" after optional indentation, followed by whitespace
+    if not stripped[1:2].isspace():
+        return None
+    level = len(line[:len(line) - len(stripped)].expandtabs(4)) // 2
+    return Block(LIST_ITEM, stripped[1:].strip(), level, stripped[0], line)
+
+
+# Line classifiers keyed by the first non-space character; a classifier
+# returns None when the line turns out to be a plain paragraph.
+_CLASSIFIERS = {
+    "#": _classify_heading,
+    ">": _classify_quote,
+    "-": _classify_list_item,
+    "*": _classify_list_item,
+    "+": _classify_list_item,
+}
+
+
+def split_table_row(line: str) -> list:
+    """Cells of a GFM table row, without the optional outer pipes."""
+    row = line.strip()
+    if row.startswith("|"):
+        row = row[1:]
+    if row.endswith("|") and not row.endswith("\\|"):
+        row = row[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in _CELL_SEPARATOR.split(row)]
+
+
+def _table_alignments(line: str, column_count: int) -> Optional[str]:
+    """Column alignments if `line` is a delimiter row ("| :--- | ---: |") for the header, else None."""
+    if "-" not in line:
+        return None
+    cells = split_table_row(line)
+    if len(cells) != column_count or not all(_ALIGNMENT_CELL.fullmatch(cell) for cell in cells):
+        return None
+    return "".join("c" if cell[0] == cell[-1] == ":" else "r" if cell[-1] == ":" else "l" if cell[0] == ":" else "-"
+                   for cell in cells)
+
+
+def _table_block(lines: list, header: list, alignments: str) -> Block:
+    # Body rows are padded or cut to the header's column count, as in GFM
+    column_count = len(header)
+    rows = [tuple(header)]
+    for line in lines[2:]:
+        cells = split_table_row(line)
+        rows.append(tuple(cells[:column_count]) + ("",) * (column_count - len(cells)))
+    return Block(TABLE, "\n".join(lines), column_count, alignments, lines[0], tuple(rows))
+
+
+def tokenize_blocks(source: Union[str, TextIO, Iterable[str]]) -> Iterator[Block]:
+    """
+    Tokenize Markdown into Blocks: headings, list items, fenced code blocks,
+    block quotes, GFM pipe tables, blank lines and (single-line) paragraphs.
+    An unclosed code fence runs to the end of the document.
+
+    Each line is classified in one step by its first non-space character.
+    A paragraph line containing "|" is held back for one line, in case the
+    next line is the delimiter row of a table.
+    """
+    in_code_block = False
+    fence_line = ""
+    code_lines = []
+    table_header = None  # Paragraph that may be a table header, with its cells
+    table_lines = None   # Lines of the table being read
+    classifiers = _CLASSIFIERS
+
+    for line in iter_lines(source):
+        stripped = line.lstrip()
+
+        if in_code_block:
+            if stripped.startswith("```"):
+                in_code_block = False
+                yield _fence_block(fence_line, code_lines)
+            else:
+                code_lines.append(line)
+            continue
+
+        # Fenced code block delimiters (``` markers) start a fence, not a block
+        if stripped.startswith("```"):
+            block = None
+        else:
+            classify = classifiers.get(stripped[:1])
+            block = classify(line, stripped) if classify else None
+            if block is None:
+                block = Block(PARAGRAPH, stripped.rstrip(), source=line) if stripped else Block(BLANK, source=line)
+
+        if table_lines is not None:
+            # Table rows continue until a blank line or another kind of block
+            if block is not None and block.kind == PARAGRAPH:
+                table_lines.append(line)
+                continue
+            yield _table_block(table_lines, *table_header)
+            table_header = table_lines = None
+        elif table_header is not None:
+            header, cells = table_header
+            alignments = _table_alignments(line, len(cells)) if block is not None and block.kind == PARAGRAPH else None
+            if alignments is not None:
+                table_header = (cells, alignments)
+                table_lines = [header.source, line]
+                continue
+            yield header
+            table_header = None
+
+        if block is None:
+            in_code_block = True
+            fence_line = line
+            code_lines = []
+        elif block.kind == PARAGRAPH and "|" in stripped:
+            table_header = (block, split_table_row(stripped))
+        else:
+            yield block
+
+    if in_code_block:
+        yield _fence_block(fence_line, code_lines)
+    elif table_lines is not None:
+        yield _table_block(table_lines, *table_header)
+    elif table_header is not None:
+        yield table_header[0]
+
+
+def _fence_block(fence_line: str, code_lines: list) -> Block:
+    return Block(FENCE, "\n".join(code_lines), info=fence_line.strip().lstrip("`").strip(), source=fence_line)
@@ -6,6 +6,17 @@ from docx.oxml.ns import qn
 from docx.shared import Twips
 from docx.oxml import OxmlElement
 
+from docx_writer import DocxStreamWriter, append_table
+from inline_spans import add_spans, tokenize_inline
+from markdown_blocks import BLANK, FENCE, HEADING, LIST_ITEM, PARAGRAPH, TABLE, tokenize_blocks
+from template_cache import load_template
+
+CUSTOM_STYLE_NAMES = ('Custom Heading 1', 'Custom Heading 2', 'Custom Heading 3', 'Custom List', 'Custom Body')
+
+# Paragraph properties written by the streaming backend, as process_block sets them
+KEEP_WITH_NEXT_PROPERTIES = '<w:keepNext/>'
+LIST_NUMBERING_PROPERTIES = '<w:numPr><w:ilvl w:val="{level}"/><w:numId w:val="1"/></w:numPr>'
+
 def create_element(name):
     """Create an OxmlElement with the given name"""
     return OxmlElement(name)
@@ -106,33 +117,34 @@ def add_table_of_contents(document):
     
     document.add_paragraph()  # Add space after TOC
 
-def process_line(document, line, styles, list_level=0):
-    """Process a single line of markdown with enhanced formatting"""
-    line = line.strip()
-    
-    if not line:
-        return
-    
-    if line.startswith('# '):
-        p = document.add_paragraph(line[2:], style=styles['Custom Heading 1'])
-        p.paragraph_format.keep_with_next = True
-        return
-    
-    if line.startswith('## '):
-        p = document.add_paragraph(line[3:], style=styles['Custom Heading 2'])
-        p.paragraph_format.keep_with_next = True
+def unindent_heading(block):
+    """
+    Turn an indented heading line ("   ## Title"), which the tokenizer reads
+    as a paragraph, back into a heading, as this converter has always
+    matched headings on the stripped line
+    """
+    if block.kind == PARAGRAPH and block.text.startswith('#') and block.source[:1].isspace():
+        heading = next(tokenize_blocks(block.text))
+        if heading.kind == HEADING:
+            return heading._replace(source=block.source)
+    return block
+
+def process_block(document, block, styles):
+    """Process a single tokenized markdown block with enhanced formatting"""
+    block = unindent_heading(block)
+    if block.kind == BLANK:
         return
     
-    if line.startswith('### '):
-        p = document.add_paragraph(line[4:], style=styles['Custom Heading 3'])
+    if block.kind == HEADING and block.level <= 3:
+        p = document.add_paragraph(block.text, style=styles[f'Custom Heading {block.level}'])
         p.paragraph_format.keep_with_next = True
         return
     
-    if line.startswith('- '):
-        level = (len(line) - len(line.lstrip())) // 2
-        p = document.add_paragraph(line[2:], style=styles['Custom List'])
-        p.style.paragraph_format.left_indent = Twips(360 * (level + 1))
-        p.style.paragraph_format.first_line_indent = Twips(-360)
+    if block.kind == LIST_ITEM and block.info == '-':
+        level = block.level
+        p = document.add_paragraph(style=styles['Custom List'])
+        add_spans(p, tokenize_inline(block.text))
+        set_list_indent(p.style, level)
         
         # Add custom bullet points
         pPr = p._p.get_or_add_pPr()
@@ -146,10 +158,61 @@ def process_line(document, line, styles, list_level=0):
         pPr.append(numPr)
         return
     
-    p = document.add_paragraph(line, style=styles['Custom Body'])
-
-def convert_markdown_to_docx(markdown_content, output_file='output.docx'):
-    """Convert markdown content to a professionally styled Word document"""
+    if block.kind == FENCE:
+        # Code lines are kept as plain body paragraphs
+        for code_line in block.text.split('\n'):
+            if code_line.strip():
+                document.add_paragraph(code_line.strip(), style=styles['Custom Body'])
+        return
+    
+    if block.kind == TABLE:
+        append_table(document, block.rows, block.info)
+        return
+    
+    # Paragraphs, and anything without a dedicated style, keep their source line
+    text = block.text if block.kind == PARAGRAPH else block.source.strip()
+    p = document.add_paragraph(style=styles['Custom Body'])
+    add_spans(p, tokenize_inline(text))
+
+def process_block_streaming(writer, block, styles):
+    """
+    Write a single tokenized markdown block through a DocxStreamWriter, as
+    process_block would render it. Returns the list level for list items.
+    """
+    block = unindent_heading(block)
+    if block.kind == BLANK:
+        return None
+    
+    if block.kind == HEADING and block.level <= 3:
+        writer.add_paragraph(block.text, f'Custom Heading {block.level}', KEEP_WITH_NEXT_PROPERTIES)
+        return None
+    
+    if block.kind == LIST_ITEM and block.info == '-':
+        writer.add_span_paragraph(tokenize_inline(block.text), 'Custom List',
+                                  LIST_NUMBERING_PROPERTIES.format(level=block.level))
+        return block.level
+    
+    if block.kind == FENCE:
+        for code_line in block.text.split('\n'):
+            if code_line.strip():
+                writer.add_paragraph(code_line.strip(), 'Custom Body')
+        return None
+    
+    if block.kind == TABLE:
+        writer.add_table(block.rows, block.info)
+        return None
+    
+    text = block.text if block.kind == PARAGRAPH else block.source.strip()
+    writer.add_span_paragraph(tokenize_inline(text), 'Custom Body')
+    return None
+
+def set_list_indent(list_style, level):
+    """Indent the list style for the given nesting level"""
+    list_style.paragraph_format.left_indent = Twips(360 * (level + 1))
+    list_style.paragraph_format.first_line_indent = Twips(-360)
+
+def create_base_document():
+    """Create the styled document with the table of contents"""
     doc = Document()
     
     # Set document properties
@@ -161,21 +224,53 @@ def convert_markdown_to_docx(markdown_content, output_file='output.docx'):
     set_document_margins(doc)
     
     # Create custom styles
-    styles = create_custom_styles(doc)
+    create_custom_styles(doc)
     
     # Add table of contents
     add_table_of_contents(doc)
     
-    # Process content
-    current_list_level = 0
+    return doc
+
+def build_base_document(cached_template=False):
+    """
+    Return the styled base document and its custom styles. With
+    `cached_template` the document is a copy of a prebuilt template cached
+    on disk (see template_cache) instead of being styled from scratch.
+    """
+    if cached_template:
+        doc = load_template("md2docx_1", create_base_document, __file__)
+    else:
+        doc = create_base_document()
+    styles = {name: doc.styles[name] for name in CUSTOM_STYLE_NAMES}
+    return doc, styles
+
+def convert_markdown_to_docx(markdown_content, output_file='output.docx', streaming=False, cached_template=False):
+    """
+    Convert markdown content to a professionally styled Word document.
+    `markdown_content` is the markdown text or a text file object; files are
+    read line by line rather than loaded whole.
+    With `streaming` the body is written as XML straight into the output
+    file (see docx_writer) instead of through python-docx objects.
+    With `cached_template` the styled base document is cloned from a cached
+    template, which saves most of the setup cost when converting many files.
+    """
+    doc, styles = build_base_document(cached_template)
+    
+    if streaming:
+        with DocxStreamWriter(doc, output_file) as writer:
+            list_level = None
+            for block in tokenize_blocks(markdown_content):
+                level = process_block_streaming(writer, block, styles)
+                if level is not None:
+                    list_level = level
+            # process_block indents the shared list style for every item; the last one wins
+            if list_level is not None:
+                set_list_indent(styles['Custom List'], list_level)
+        return
     
-    for line in markdown_content.split('\n'):
-        process_line(doc, line, styles, current_list_level)
-        
-        if line.strip().startswith('- '):
-            current_list_level = (len(line) - len(line.lstrip())) // 2
-        else:
-            current_list_level = 0
+    # Process content
+    for block in tokenize_blocks(markdown_content):
+        process_block(doc, block, styles)
     
     # Save with optimization for reading
     doc.save(output_file)
@@ -590,4 +685,6 @@ To find a unique patch use this formula [auto-correlation]
 - ΣdΣx,y (I(x,y) - I(x+dx,y+dy))2
 
 The end"""
-convert_markdown_to_docx(markdown_content, 'enhanced_course_summary.docx')
\ No newline at end of file
+
+if __name__ == "__main__":
+    convert_markdown_to_docx(markdown_content, 'enhanced_course_summary.docx')
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Cached, prebuilt style templates for the md2docx converters.
+
+Building the styled base document (margins, styles, header/footer, title
+page or table of contents) on a fresh python-docx Document costs more than
+the conversion of a small Markdown file. load_template() builds it once,
+stores it as a .docx blob in the cache directory, parses it once per process
+and hands out in-memory copies, so batch jobs skip both the style setup and
+the parse of python-docx's default template.
+
+The cache key covers the template name, the python-docx version and the
+source of the module that builds the template, so editing the styling code
+invalidates the cached blob.
+"""
+
+import copy
+import hashlib
+import os
+import tempfile
+
+import docx
+from docx import Document
+
+TEMPLATE_CACHE_DIR = os.environ.get("MD2DOCX_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "md2docx")
+
+# Parsed templates of this process, keyed by cache key
+_templates = {}
+
+
+def template_cache_key(name, source_file):
+    """Hash of the template name, the python-docx version and the builder's source."""
+    digest = hashlib.sha256(f"{name}\0{getattr(docx, '__version__', '')}\0".encode())
+    with open(source_file, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def load_template(name, build, source_file, cache_dir=None):
+    """
+    Return a copy of the template document made by `build()`.
+    `source_file` is the module that defines `build`; it is part of the cache key.
+    """
+    key = template_cache_key(name, source_file)
+    if key not in _templates:
+        path = os.path.join(cache_dir or TEMPLATE_CACHE_DIR, f"{name}-{key}.docx")
+        if not os.path.exists(path):
+            _save_template(build(), path)
+        _templates[key] = Document(path)
+    return copy.deepcopy(_templates[key])
+
+
+def _save_template(document, path):
+    """Save the template atomically, so parallel workers never read a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".docx", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            document.save(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise